@@ -1,8 +1,10 @@
-import sqlite3
+from itertools import chain
 
 
 class Field:
-    """A descriptor representing a database column."""
+    """Describes a database column, values live on the model instances."""
+
+    __slots__ = ("db_type", "primary_key", "_name")
 
     def __init__(self, db_type, primary_key=False):
         self.db_type = db_type
@@ -12,76 +14,66 @@ class Field:
     def __set_name__(self, owner, name):
         self._name = name
 
-    def __get__(self, instance, owner):
-        if instance is None:
-            return None  # allow class level access example User.username
-
-        return getattr(instance, self._name)
-
-    def __set__(self, instance, value):
-        setattr(instance, self._name, value)
-
 
 class CharField(Field):
+    __slots__ = ("max_length",)
+
     def __init__(self, max_length=255, **kwargs):
         self.max_length = max_length
         super().__init__(f"VARCHAR({max_length})", **kwargs)
 
 
 class IntegerField(Field):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__("INTEGER", **kwargs)
 
 
 # the lazy queryset
 class QuerySet:
-    def __init__(self, model):
-        self.model = model
-        self._filters = []  # list of where clauses
+    _sql_cache = {}  # (model, filtered columns) -> SQL string
 
-    def _clone(self):
-        cloned_qs = QuerySet(self.model)
-        cloned_qs._filters = self._filters.copy()
-        return cloned_qs
+    def __init__(self, model, _filters=()):
+        self.model = model
+        self._filters = _filters  # tuple of where clauses, shared between clones
 
     def filter(self, **kwargs):
-        cloned_qs = self._clone()
-        cloned_qs._filters.append(kwargs)
-        return cloned_qs
+        return QuerySet(self.model, self._filters + (kwargs,))
 
     def all(self):
-        return self._clone()
+        return QuerySet(self.model, self._filters)
 
     def _build_sql(self):
         """Constructs the SQL query from the model and filters"""
-        table_name = self.model._meta.db_table
-        fields = ", ".join(self.model._meta.fields.keys())
-        sql = f"SELECT {fields} FROM {table_name}"
+        # the SQL only depends on the model and the filtered columns, so it is
+        # built once per shape and reused; only the params change per query
+        shape = (self.model, tuple(tuple(f.keys()) for f in self._filters))
+        sql = QuerySet._sql_cache.get(shape)
 
-        if self._filters:
-            where_clauses = []
-            params = []
-            for f in self._filters:
-                for key, value in f.items():
-                    where_clauses.append(f"{key} = ?")
-                    params.append(value)
+        if sql is None:
+            sql = self.model._meta.select_prefix
 
-            sql += " WHERE " + " AND ".join(where_clauses)
+            if self._filters:
+                keys = chain.from_iterable(self._filters)
+                where_clauses = [f"{key} = ?" for key in keys]
 
-        return sql, tuple(params)
+                sql += " WHERE " + " AND ".join(where_clauses)
+
+            QuerySet._sql_cache[shape] = sql
+
+        params = tuple(chain.from_iterable(f.values() for f in self._filters))
+        return sql, params
 
     def __iter__(self):
         sql, params = self._build_sql()
         print(f"  [SQL] Executing: {sql} with params {params}")
 
-        with sqlite3.connect(":memory:") as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            # This is a mock execution, a real ORM would have the table
-            # For this demo, we can't actually execute, so we yield mock objects
+        # This is a mock execution, a real ORM would have the table
+        # For this demo, we can't actually execute, so we yield mock objects
 
         if "id=1" in sql:
-            obj = self.model(id=1, username="shaheer", email="shaheer@gmail.com")
+            obj = self.model._hydrate((1, "shaheer", "shaheer@gmail.com"))
             yield obj
 
 
@@ -92,15 +84,21 @@ class Manager:
     def get_queryset(self):
         return QuerySet(self.model)
 
-    def __getattr__(self, name):
-        return getattr(self.get_queryset(), name)
+    def filter(self, **kwargs):
+        return self.get_queryset().filter(**kwargs)
+
+    def all(self):
+        return self.get_queryset()
 
 
 class ModelOptions:
     def __init__(self, meta_class_attrs):
         self.db_table = meta_class_attrs.get("db_table")
         self.fields = {}
+        self.field_names = ()
         self.pk_field = None
+        self.fields_sql = None
+        self.select_prefix = None
 
 
 class ModelMetaclass(type):
@@ -119,7 +117,10 @@ class ModelMetaclass(type):
         meta_attrs = attrs.get("Meta", type("Meta", (), {}))
         opts = ModelOptions(meta_attrs.__dict__)
         opts.fields = fields
+        opts.field_names = tuple(fields)
         opts.db_table = opts.db_table or name.lower() + "s"
+        opts.fields_sql = ", ".join(fields.keys())
+        opts.select_prefix = f"SELECT {opts.fields_sql} FROM {opts.db_table}"
 
         for field_name, field_obj in fields.items():
             if field_obj.primary_key:
@@ -127,6 +128,11 @@ class ModelMetaclass(type):
 
         attrs["_meta"] = opts
 
+        # field values live directly in slots, no per-row __dict__
+        for field_name in fields:
+            del attrs[field_name]
+        attrs["__slots__"] = tuple(fields)
+
         # add the manager
         attrs["objects"] = Manager(model=None)
 
@@ -141,10 +147,20 @@ class ModelMetaclass(type):
 class Model(metaclass=ModelMetaclass):
     """Base class for all models."""
 
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         for field_name in self._meta.fields:
             setattr(self, field_name, kwargs.get(field_name))
 
+    @classmethod
+    def _hydrate(cls, row):
+        """Builds an instance from a row whose values are in field order."""
+        obj = cls.__new__(cls)
+        for field_name, value in zip(cls._meta.field_names, row, strict=True):
+            setattr(obj, field_name, value)
+        return obj
+
     def __repr__(self):
         field_values = {f: getattr(self, f) for f in self._meta.fields}
         return f"<{self.__class__.__name__}:{field_values}>"
@@ -1,5 +1,48 @@
+import asyncio
+import gzip
 import inspect
-from functools import wraps
+import json
+from collections import namedtuple
+from functools import lru_cache
+from itertools import chain
+
+
+@lru_cache(maxsize=None)
+def _cached_sig(func):
+    """Build the signature of a callable once and reuse it on every request."""
+    sig = getattr(func, "__signature__", None)
+    if sig is not None:
+        return sig
+    return inspect.signature(func)
+
+
+# one call in a route's plan: the callable, how it has to be called (one of
+# the _SETUP kinds) and the (param_name, step index) pairs it is called with
+Step = namedtuple("Step", ["func", "kind", "args"])
+
+# source lines emitted for each kind of step; {i} is the step index
+_SETUP = {
+    "function": ("_d{i} = _f{i}({args})",),
+    "coroutine": ("_d{i} = await _f{i}({args})",),
+    "generator": ("_g{i} = _f{i}({args})", "_d{i} = next(_g{i})"),
+    "async_generator": ("_g{i} = _f{i}({args})", "_d{i} = await anext(_g{i})"),
+}
+
+# 'yield' kinds resume their generator once the request is done
+_TEARDOWN = {
+    "generator": "next(_g{i}, None)",
+    "async_generator": "await anext(_g{i}, None)",
+}
+
+
+def _step_kind(func) -> str:
+    if inspect.isgeneratorfunction(func):
+        return "generator"
+    if inspect.isasyncgenfunction(func):
+        return "async_generator"
+    if inspect.iscoroutinefunction(func):
+        return "coroutine"
+    return "function"
 
 
 class Depends:
@@ -7,85 +50,141 @@ class Depends:
         self.dependency = dependency
 
 
+@lru_cache(maxsize=None)
+def _depends_params(func) -> tuple:
+    """The ``(name, dependency)`` pairs of the ``Depends`` parameters of ``func``."""
+    # plain functions: read the defaults straight off the code object instead
+    # of building a full Signature, unless something overrides that signature
+    if (
+        inspect.isfunction(func)
+        and not hasattr(func, "__wrapped__")
+        and getattr(func, "__signature__", None) is None
+    ):
+        code = func.__code__
+        names = code.co_varnames[: code.co_argcount]
+        defaults = func.__defaults__ or ()
+        defaults = zip(names[len(names) - len(defaults) :], defaults)
+        kwdefaults = (func.__kwdefaults__ or {}).items()
+        return tuple(
+            (name, default.dependency)
+            for name, default in chain(defaults, kwdefaults)
+            if isinstance(default, Depends)
+        )
+
+    return tuple(
+        (name, param.default.dependency)
+        for name, param in _cached_sig(func).parameters.items()
+        if isinstance(param.default, Depends)
+    )
+
+
 class Fastapi:
-    def __init__(self):
+    def __init__(self, gzip_min_size: int | None = 500):
         self.routes = {}
+        # bodies larger than this many bytes are gzipped, None disables it
+        self.gzip_min_size = gzip_min_size
 
     def get(self, path: str):
         """Decorator to register a path operation function."""
 
         def decorator(func):
-            self.routes[path] = func
+            self.routes[path] = self._compile_dispatcher(path, self._build_plan(func))
+            return func
+
+        return decorator
 
-            @wraps(func)
-            def wrapper(*args, **kwargs):
-                return func(*args, **kwargs)
+    def _build_plan(self, func) -> tuple:
+        """
+        Flattens the dependency graph of ``func`` into a tuple of ``Step``
+        entries in the order they have to run, with ``func`` itself last. Each
+        dependency appears once and steps refer to their arguments by index.
+        """
+        plan = []
+        indexes = {}  # callable -> position of its step in the plan
 
-            return wrapper
+        def visit(fn):
+            # caching: every dependency is solved once per request
+            if fn in indexes:
+                return indexes[fn]
 
-        return decorator
+            args = tuple(
+                (name, visit(dep_func)) for name, dep_func in _depends_params(fn)
+            )
+            indexes[fn] = len(plan)
+            plan.append(Step(fn, _step_kind(fn), args))
+            return indexes[fn]
 
-    def _solve_dependencies(
-        self, func, request_cache: dict, context_managers: list
-    ) -> dict:
+        visit(func)
+        return tuple(plan)
+
+    def _compile_dispatcher(self, path: str, plan: tuple):
+        """
+        Generates a specialized function for one route that calls every step
+        of its plan inline, so a request is a single call with no plan walking,
+        cache lookups or teardown bookkeeping.
         """
-        The core of the DI system. This function recursively resolves dependencies.
+        namespace = {}
+        lines = ["async def _dispatch():"]
+        # 'yield' steps: the generator of step i lives in the local _g{i}
+        generators = [i for i, step in enumerate(plan) if step.kind in _TEARDOWN]
+        indent = "        " if generators else "    "
+
+        # handle 'yield' case: the whole body runs inside a single try/finally,
+        # so the generated code stays flat however many there are
+        if generators:
+            lines.extend(f"    _g{i} = None" for i in generators)
+            lines.append("    try:")
+
+        # the value of step i lives in the local _d{i}
+        for i, (func, kind, params) in enumerate(plan):
+            namespace[f"_f{i}"] = func
+            args = ", ".join(f"{name}=_d{index}" for name, index in params)
+            for line in _SETUP[kind]:
+                lines.append(indent + line.format(i=i, args=args))
+
+        lines.append(f"{indent}return _d{len(plan) - 1}")
+
+        # tear down the generators that were started, in reverse order of setup
+        if generators:
+            lines.append("    finally:")
+            for i in reversed(generators):
+                lines.append(f"        if _g{i} is not None:")
+                lines.append(f"            {_TEARDOWN[plan[i].kind].format(i=i)}")
+
+        code = compile("\n".join(lines), f"<dispatch:{path}>", "exec")
+        exec(code, namespace)
+        return namespace["_dispatch"]
+
+    def _encode_response(self, response) -> tuple[dict, bytes]:
         """
-        sig = inspect.signature(func)
-        kwargs_to_pass = {}
-
-        for name, param in sig.parameters.items():
-            if isinstance(param.default, Depends):
-                dep_func = param.default.dependency
-
-                # caching if we already sovled this
-                if dep_func in request_cache:
-                    kwargs_to_pass[name] = request_cache[dep_func]
-                    continue
-
-                # recursion: the dependency might have its own dependencies
-                sub_dependencies = self._solve_dependencies(
-                    dep_func, request_cache, context_managers
-                )
-
-                # handle 'yield' case
-                if inspect.isgenerator(dep_func):
-                    gen = dep_func(**sub_dependencies)
-                    yielded_value = next(gen)
-                    kwargs_to_pass[name] = yielded_value
-                    context_managers.append(gen)
-                else:
-                    result = dep_func(**sub_dependencies)
-                    kwargs_to_pass[name] = result
-
-            request_cache[dep_func] = kwargs_to_pass[name]
-
-        return kwargs_to_pass
-
-    def run_request(self, path: str):
+        Serializes a response to UTF-8 JSON and gzips it when it is large
+        enough. Values JSON has no type for are encoded as their ``str()``.
+        """
+        body = json.dumps(
+            response, separators=(",", ":"), ensure_ascii=False, default=str
+        ).encode()
+
+        headers = {"Content-Type": "application/json"}
+        if self.gzip_min_size is not None and len(body) > self.gzip_min_size:
+            # level 1 gets most of the size reduction for very little CPU
+            body = gzip.compress(body, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        headers["Content-Length"] = str(len(body))
+
+        return headers, body
+
+    async def run_request(self, path: str):
         print("incoming request")
-        endpoint_fun = self.routes.get(path)
-        if not endpoint_fun:
+        dispatch = self.routes.get(path)
+        if not dispatch:
             print("no path found: 404")
             return
 
-        request_cache = {}
-        context_managers = []
-
-        try:
-            solved_kwargs = self._solve_dependencies(
-                endpoint_fun, request_cache, context_managers
-            )
-            response = endpoint_fun(**solved_kwargs)
-            print(f"status 200: {response}")
-        finally:
-            # execute context managers (tear down)
-            for gen in reversed(context_managers):
-                try:
-                    next(gen, None)
-                except StopIteration:
-                    pass
+        response = await dispatch()
+        headers, body = self._encode_response(response)
+        print(f"status 200: {response} {headers}")
         print("tear down complete")
+        return headers, body
 
 
 # usage
@@ -111,4 +210,4 @@ def get_current_user_profile(user: dict = Depends(get_user_from_db)):
     return {"profile_data": f"Data for {user['username']}"}
 
 
-app.run_request("/users/me")
+asyncio.run(app.run_request("/users/me"))